@@ -1,14 +1,18 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-import psycopg2
-import psycopg2.extras
+from flask import Flask, render_template, request, redirect, url_for, session, flash, g, make_response
+from psycopg.pq import TransactionStatus
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_mail import Mail, Message
-from datetime import datetime, timedelta, date
-import pytz
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+from celery import Celery
+from flask_caching import Cache
+from datetime import datetime
+from zoneinfo import ZoneInfo
 from functools import wraps
-import atexit
+from cachetools import TTLCache
+import threading
+import time
+import hashlib
 import os
 from dotenv import load_dotenv
 
@@ -20,13 +24,80 @@ app.secret_key = os.environ.get("SECRET_KEY", "default_secret_key")
 # ----------------- DB CONFIG ------------------
 DATABASE_URL = os.environ.get("DATABASE_URL")  # Render ka External Database URL
 
+POOL = None
+
+# hot queries: execute(..., prepare=True) -> psycopg har connection pe ek baar PREPARE karta hai
+# completed nullable hai; NULL ko pending (FALSE) maano, jaise toggle_task
+HOT_QUERIES = {
+    'dash_stats': """
+        SELECT
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE completed) AS completed,
+            COUNT(*) FILTER (WHERE NOT COALESCE(completed, FALSE)
+                               AND due_date < now()) AS overdue,
+            COUNT(*) FILTER (WHERE NOT COALESCE(completed, FALSE)
+                               AND due_date BETWEEN now() AND now() + interval '2 days') AS due_soon
+        FROM tasks
+        WHERE user_id = %s
+    """,
+    'dash_list': """
+        SELECT id, description, COALESCE(completed, FALSE) AS completed, due_date,
+               COALESCE(NOT COALESCE(completed, FALSE)
+                        AND due_date < now(), FALSE) AS overdue,
+               COALESCE(NOT COALESCE(completed, FALSE)
+                        AND due_date BETWEEN now() AND now() + interval '2 days', FALSE) AS due_soon
+        FROM tasks
+        WHERE user_id = %s
+        ORDER BY due_date NULLS LAST, id  -- id: tie-breaker, warna LIMIT/OFFSET pages rows repeat/skip karte
+        LIMIT %s OFFSET %s
+    """,
+    'toggle_task': 'UPDATE tasks SET completed = NOT COALESCE(completed, FALSE) WHERE id = %s AND user_id = %s',
+    'delete_task': 'DELETE FROM tasks WHERE id = %s AND user_id = %s',
+    'add_task': 'INSERT INTO tasks (description, due_date, user_id, completed) VALUES (%s, %s, %s, %s)',
+}
+
+def init_pool():
+    # dict_row -> rows ko dict jaisa access: row['column']
+    global POOL
+    POOL = ConnectionPool(
+        conninfo=DATABASE_URL, min_size=2, max_size=10, open=True,
+        kwargs={
+            'row_factory': dict_row,
+            'options': '-c timezone=Asia/Kolkata',  # due_date IST mein wapas aaye
+        }
+    )
+
+init_pool()
+# gunicorn --preload forks workers after import; har worker ko apna pool chahiye
+os.register_at_fork(after_in_child=init_pool)
+
 def get_conn():
-    # DictCursor -> rows ko dict jaisa access: row['column']
-    return psycopg2.connect(DATABASE_URL, cursor_factory=psycopg2.extras.DictCursor)
+    # one pooled connection per app context, reused until put_conn()/teardown
+    if 'conn' not in g:
+        g.conn = POOL.getconn()
+    return g.conn
+
+def _release(conn):
+    # read-only handlers transaction khula chhodte hain; pool ko idle connection wapas do
+    if conn.info.transaction_status == TransactionStatus.INTRANS:
+        conn.rollback()
+    POOL.putconn(conn)
+
+def put_conn(conn):
+    g.pop('conn', None)
+    _release(conn)
+
+@app.teardown_appcontext
+def _return_conn(_exc):
+    # safety net: handler crashed before put_conn()
+    conn = g.pop('conn', None)
+    if conn is not None:
+        _release(conn)
 
 # ----------------- INIT DB (tables if missing) ------------------
 def init_db():
-    conn = get_conn()
+    # boot pe app context nahi hota, isliye seedha pool se
+    conn = POOL.getconn()
     cur = conn.cursor()
 
     # users
@@ -39,20 +110,60 @@ def init_db():
         )
     """)
 
-    # tasks (note: we use description; title optional/NULL)
+    # tasks (sirf description; purana duplicate title column neeche drop hota hai)
     cur.execute("""
         CREATE TABLE IF NOT EXISTS tasks (
             id SERIAL PRIMARY KEY,
             user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
             description TEXT NOT NULL,
-            due_date TIMESTAMP,
+            due_date TIMESTAMPTZ,
             completed BOOLEAN DEFAULT FALSE
         )
     """)
 
+    # purane naive due_date (datetime-local se aaye, IST wall time) -> TIMESTAMPTZ
+    cur.execute("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'tasks' AND column_name = 'due_date'
+    """)
+    if cur.fetchone()['data_type'] == 'timestamp without time zone':
+        cur.execute("""
+            ALTER TABLE tasks ALTER COLUMN due_date TYPE TIMESTAMPTZ
+            USING due_date AT TIME ZONE 'Asia/Kolkata'
+        """)
+
+    # login lower(username) pe dhoondta hai; purane case-only duplicates hon to index skip,
+    # warna unique index fail hoke har process (web, celery, scheduler) ka boot rok deta
+    cur.execute("""
+        SELECT lower(username) AS username FROM users
+        GROUP BY lower(username) HAVING COUNT(*) > 1
+    """)
+    dupes = [r['username'] for r in cur.fetchall()]
+    if dupes:
+        print(f"⚠️ Skipping ix_users_username_lower: usernames differ only by case: {', '.join(dupes)}")
+    else:
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username_lower ON users (lower(username))")
+
+    # title hamesha description ki copy tha -- row/WAL size double
+    cur.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS title")
+
+    # last reminder mail time, so send_reminders() doesn't repeat every hour
+    cur.execute("ALTER TABLE tasks ADD COLUMN IF NOT EXISTS reminder_sent TIMESTAMPTZ")
+
+    # indexes: dashboard/stats filter by user, reminders scan pending dated tasks
+    # (user_id, due_date, id) dashboard ke "ORDER BY due_date NULLS LAST, id" ko serve karta hai;
+    # purana (user_id, due_date) wala index replace
+    cur.execute("DROP INDEX IF EXISTS ix_tasks_user_due")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_tasks_user_due_id ON tasks (user_id, due_date NULLS LAST, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_tasks_user_completed ON tasks (user_id, completed)")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS ix_tasks_due_pending ON tasks (due_date)
+        WHERE completed = FALSE AND due_date IS NOT NULL
+    """)
+
     conn.commit()
     cur.close()
-    conn.close()
+    POOL.putconn(conn)
 
 init_db()
 
@@ -64,8 +175,95 @@ app.config['MAIL_USERNAME'] = os.environ.get("MAIL_USERNAME")
 app.config['MAIL_PASSWORD'] = os.environ.get("MAIL_PASSWORD")
 mail = Mail(app)
 
+# ----------------- TASK QUEUE ------------------
+# SMTP request thread pe nahi chalega; worker alag se chalao:
+#   celery -A app.celery worker --concurrency=4
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+app.config['CELERY_BROKER_URL'] = REDIS_URL
+
+def make_celery(flask_app):
+    # fixed main name: "python app.py" se chalane pe bhi tasks "app.*" naam se register hon,
+    # jo "celery -A app.celery worker" jaanta hai (warna __main__.* unregistered)
+    celery_app = Celery('app', broker=flask_app.config['CELERY_BROKER_URL'])
+
+    class ContextTask(celery_app.Task):
+        def __call__(self, *args, **kwargs):
+            with flask_app.app_context():
+                return self.run(*args, **kwargs)
+
+    celery_app.Task = ContextTask
+    return celery_app
+
+celery = make_celery(app)
+
+def build_message(to_email, subject, body_text):
+    msg = Message(subject=subject, sender=app.config['MAIL_USERNAME'], recipients=[to_email])
+    msg.body = body_text
+    return msg
+
+@celery.task
+def send_email_task(to_email, subject, body_text):
+    mail.send(build_message(to_email, subject, body_text))
+
+@celery.task
+def send_email_batch_task(messages):
+    # messages: [(to_email, subject, body_text, task_ids), ...] -- ek hi SMTP/TLS session sab ke liye
+    failed_ids = []
+    done = 0  # kitne messages ka send try ho chuka (success ya caught failure)
+    try:
+        with mail.connect() as smtp:
+            for to_email, subject, body_text, task_ids in messages:
+                try:
+                    smtp.send(build_message(to_email, subject, body_text))
+                except Exception as e:
+                    # ek kharab address baaki batch ko na roke
+                    print(f"❌ Reminder to {to_email} failed: {e}")
+                    failed_ids.extend(task_ids)
+                done += 1
+    except Exception as e:
+        # SMTP connect/session hi fail -> jo bheje nahi gaye woh sab failed
+        print(f"❌ Reminder batch aborted: {e}")
+        for _to, _subject, _body, task_ids in messages[done:]:
+            failed_ids.extend(task_ids)
+
+    if failed_ids:
+        # reminder_sent enqueue pe stamp hua tha; hatao taaki agle run mein retry ho
+        with POOL.connection() as conn:
+            conn.execute('UPDATE tasks SET reminder_sent = NULL WHERE id = ANY(%s)', (failed_ids,))
+
+# ----------------- CACHE ------------------
+cache = Cache(app, config={
+    'CACHE_TYPE': 'RedisCache',
+    'CACHE_REDIS_URL': REDIS_URL,
+    'CACHE_KEY_PREFIX': os.environ.get("CACHE_KEY_PREFIX", "flask_cache_"),
+})
+
+# rendered dashboard HTML; har task write pe user ka version badhta hai
+DASH_CACHE_TIMEOUT = 300
+
+def _cache_call(fn, *args, **kwargs):
+    # Redis optional hai: down ho to bina cache ke chalo, 500 nahi
+    try:
+        return fn(*args, **kwargs)
+    except Exception as e:
+        print(f"⚠️ Cache unavailable: {e}")
+        return None
+
+def dashboard_version(uid):
+    return _cache_call(cache.get, f"user_version:{uid}") or 0
+
+def dashboard_bucket():
+    # overdue/due_soon waqt ke saath badalte hain, isliye etag mein 5-min bucket bhi
+    return int(time.time() // DASH_CACHE_TIMEOUT)
+
+def bump_dashboard_version(uid):
+    # Flask-Caching ka Cache inc() proxy nahi karta; cachelib backend pe seedha
+    _cache_call(cache.cache.inc, f"user_version:{uid}")
+
 # ----------------- UTIL ------------------
-TZ = pytz.timezone('Asia/Kolkata')
+TZ = ZoneInfo('Asia/Kolkata')
+UTC = ZoneInfo('UTC')
+PAGE_SIZE = 50  # dashboard pe ek page mein itne tasks
 
 def login_required(fn):
     @wraps(fn)
@@ -75,13 +273,24 @@ def login_required(fn):
         return fn(*args, **kwargs)
     return wrapper
 
-def cast_bool(v):
+def parse_due(s):
+    # HTML datetime-local "YYYY-MM-DDTHH:MM" (IST) -> aware datetime; strptime se fast
+    if not s or len(s) < 16 or s[4] != '-' or s[7] != '-' or s[10] != 'T' or s[13] != ':':
+        return None
     try:
-        return bool(int(v))
-    except Exception:
-        return bool(v)
+        return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                        int(s[11:13]), int(s[14:16]), tzinfo=TZ)
+    except ValueError:
+        return None
 
 # ----------------- AUTH ------------------
+# sha256(username|password) -> (id, username); PBKDF2 har login pe dobara nahi chalega
+_auth_cache = TTLCache(maxsize=1024, ttl=300)
+_auth_cache_lock = threading.Lock()
+
+def _auth_key(username, password):
+    return hashlib.sha256((username + '|' + password).encode()).digest()
+
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
@@ -97,6 +306,12 @@ def register():
         conn = get_conn()
         cur = conn.cursor()
         try:
+            # case-only duplicate bhi reject; ix_users_username_lower skip hua ho tab bhi
+            cur.execute('SELECT 1 FROM users WHERE lower(username) = lower(%s)', (username,))
+            if cur.fetchone():
+                flash("Username or email already exists.", "danger")
+                return render_template('register.html')
+
             cur.execute(
                 'INSERT INTO users (username, email, password) VALUES (%s, %s, %s)',
                 (username, email, hashed)
@@ -105,11 +320,11 @@ def register():
 
             # welcome mail
             if app.config['MAIL_USERNAME'] and app.config['MAIL_PASSWORD']:
-                msg = Message("Welcome to ToDo App!",
-                              sender=app.config['MAIL_USERNAME'],
-                              recipients=[email])
-                msg.body = f"Hi {username},\n\nThanks for registering on our ToDo App!"
-                mail.send(msg)
+                send_email_task.delay(
+                    email,
+                    "Welcome to ToDo App!",
+                    f"Hi {username},\n\nThanks for registering on our ToDo App!"
+                )
 
             flash("Registration successful! Check your email.", "success")
             return redirect(url_for('login'))
@@ -118,7 +333,7 @@ def register():
             flash("Username or email already exists.", "danger")
         finally:
             cur.close()
-            conn.close()
+            put_conn(conn)
 
     return render_template('register.html')
 
@@ -128,14 +343,31 @@ def login():
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '')
 
+        key = _auth_key(username, password)
+        with _auth_cache_lock:
+            cached = _auth_cache.get(key)
+        if cached:
+            session['user_id'], session['username'] = cached
+            flash('Login successful!', 'success')
+            return redirect(url_for('dashboard'))
+
         conn = get_conn()
         cur = conn.cursor()
-        cur.execute('SELECT * FROM users WHERE username = %s', (username,))
-        user = cur.fetchone()
+        # case-insensitive; ix_users_username_lower se index lookup. Purane case-only
+        # duplicates ho sakte hain -> exact-case row pehle, jiska hash match kare wahi user
+        cur.execute("""
+            SELECT id, username, password FROM users
+            WHERE lower(username) = lower(%s)
+            ORDER BY (username = %s) DESC
+        """, (username, username))
+        candidates = cur.fetchall()
         cur.close()
-        conn.close()
+        put_conn(conn)
 
-        if user and check_password_hash(user['password'], password):
+        user = next((u for u in candidates if check_password_hash(u['password'], password)), None)
+        if user:
+            with _auth_cache_lock:
+                _auth_cache[key] = (user['id'], user['username'])
             session['user_id'] = user['id']
             session['username'] = user['username']
             flash('Login successful!', 'success')
@@ -158,71 +390,57 @@ def home():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    conn = get_conn()
-    cur = conn.cursor()
     user_id = session['user_id']
+    page = max(1, request.args.get('page', 1, type=int))
+
+    etag = f"{user_id}-{dashboard_version(user_id)}-{page}-{dashboard_bucket()}"
+    # pending flash messages page mein render hote hain -> cache/304 nahi
+    cacheable = not session.get('_flashes')
+
+    if cacheable:
+        if request.if_none_match.contains(etag):
+            # 304 ko bhi wahi ETag/Cache-Control chahiye (RFC 7232 4.1)
+            resp = _dashboard_response('', etag)
+            resp.status_code = 304
+            return resp
+        html = _cache_call(cache.get, f"dash:{etag}")
+        if html is not None:
+            return _dashboard_response(html, etag)
 
-    cur.execute("""
-        SELECT id, description, completed, due_date
-        FROM tasks
-        WHERE user_id = %s
-        ORDER BY due_date IS NULL, due_date
-    """, (user_id,))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    tasks = []
-    total = len(rows)
-    completed_cnt = 0
-    overdue_cnt = 0
-    due_soon_cnt = 0
-
-    now = datetime.now(TZ)
-    soon_threshold = now + timedelta(days=2)
-
-    for r in rows:
-        completed = cast_bool(r['completed'])
-        if completed:
-            completed_cnt += 1
-
-        overdue = False
-        due_soon = False
-
-        if r['due_date'] and not completed:
-            # Postgres returns aware/naive? treat as naive UTC-ish; compare in local TZ
-            due_dt = r['due_date']
-            if due_dt.tzinfo is None:
-                # assume UTC then convert to IST for fair compare
-                due_dt = pytz.utc.localize(due_dt).astimezone(TZ)
-            else:
-                due_dt = r['due_date'].astimezone(TZ)
-
-            if due_dt < now:
-                overdue = True
-                overdue_cnt += 1
-            elif due_dt <= soon_threshold:
-                due_soon = True
-                due_soon_cnt += 1
-
-        tasks.append({
-            'id': r['id'],
-            'description': r['description'],
-            'completed': completed,
-            'due_date': r['due_date'],
-            'overdue': overdue,
-            'due_soon': due_soon
-        })
+    conn = get_conn()
+    # counters + list dono ek hi network roundtrip mein (pipeline), binary protocol
+    stats_cur = conn.cursor(binary=True)
+    list_cur = conn.cursor(binary=True)
+    with conn.pipeline():
+        stats_cur.execute(HOT_QUERIES['dash_stats'], (user_id,), prepare=True)
+        list_cur.execute(HOT_QUERIES['dash_list'], (user_id, PAGE_SIZE, (page - 1) * PAGE_SIZE), prepare=True)
+    counts = stats_cur.fetchone()
+    tasks = list_cur.fetchall()
+    stats_cur.close()
+    list_cur.close()
+    put_conn(conn)
 
     stats = {
-        "total": total,
-        "completed": completed_cnt,
-        "pending": max(0, total - completed_cnt),
-        "overdue": overdue_cnt,
-        "due_soon": due_soon_cnt
+        "total": counts['total'],
+        "completed": counts['completed'],
+        "pending": max(0, counts['total'] - counts['completed']),
+        "overdue": counts['overdue'],
+        "due_soon": counts['due_soon']
     }
 
-    return render_template('index.html', tasks=tasks, stats=stats)
+    html = render_template('index.html', tasks=tasks, stats=stats,
+                           page=page, has_next=page * PAGE_SIZE < counts['total'])
+    if not cacheable:
+        return html
+    _cache_call(cache.set, f"dash:{etag}", html, timeout=DASH_CACHE_TIMEOUT)
+    return _dashboard_response(html, etag)
+
+def _dashboard_response(html, etag):
+    resp = make_response(html)
+    resp.set_etag(etag)
+    # browser har baar revalidate kare (304), shared caches store na karein
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
 
 @app.route('/add', methods=['GET', 'POST'])
 @login_required
@@ -235,22 +453,15 @@ def add_task():
             flash("Task description is required.", "danger")
             return redirect(url_for('dashboard'))
 
-        due_ts = None
-        if due:
-            try:
-                due_ts = datetime.strptime(due, "%Y-%m-%dT%H:%M")
-            except ValueError:
-                due_ts = None
+        due_ts = parse_due(due)
 
         conn = get_conn()
         cur = conn.cursor()
-        cur.execute(
-            'INSERT INTO tasks (title, description, due_date, user_id, completed) VALUES (%s, %s, %s, %s, %s)',
-            (desc, desc, due_ts, session['user_id'], False)
-        )
+        cur.execute(HOT_QUERIES['add_task'], (desc, due_ts, session['user_id'], False), prepare=True)
         conn.commit()
         cur.close()
-        conn.close()
+        put_conn(conn)
+        bump_dashboard_version(session['user_id'])
 
         flash('Task added successfully!', 'success')
         return redirect(url_for('dashboard'))
@@ -260,45 +471,45 @@ def add_task():
 @app.route('/edit/<int:task_id>', methods=['GET', 'POST'])
 @login_required
 def edit_task(task_id):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute('SELECT * FROM tasks WHERE id = %s AND user_id = %s', (task_id, session['user_id']))
-    task = cur.fetchone()
-
-    if not task:
-        cur.close()
-        conn.close()
-        flash('Task not found or unauthorized.', 'danger')
-        return redirect(url_for('dashboard'))
-
     if request.method == 'POST':
         desc = request.form.get('task', '').strip()
         due  = request.form.get('due_date')
         if not desc:
             flash("Task description is required.", "danger")
-            cur.close()
-            conn.close()
             return redirect(url_for('dashboard'))
 
-        due_ts = None
-        if due:
-            try:
-                due_ts = datetime.strptime(due, "%Y-%m-%dT%H:%M")
-            except ValueError:
-                due_ts = None
+        due_ts = parse_due(due)
 
+        # ownership check WHERE mein hi; rowcount 0 -> not found / unauthorized
+        conn = get_conn()
+        cur = conn.cursor()
         cur.execute(
-            'UPDATE tasks SET description = %s, due_date = %s WHERE id = %s AND user_id = %s',
+            'UPDATE tasks SET description = %s, due_date = %s, reminder_sent = NULL WHERE id = %s AND user_id = %s',
             (desc, due_ts, task_id, session['user_id'])
         )
+        updated = cur.rowcount
         conn.commit()
         cur.close()
-        conn.close()
-        flash('Task updated successfully!', 'success')
+        put_conn(conn)
+
+        if updated == 0:
+            flash('Task not found or unauthorized.', 'danger')
+        else:
+            bump_dashboard_version(session['user_id'])
+            flash('Task updated successfully!', 'success')
         return redirect(url_for('dashboard'))
 
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute('SELECT * FROM tasks WHERE id = %s AND user_id = %s', (task_id, session['user_id']))
+    task = cur.fetchone()
     cur.close()
-    conn.close()
+    put_conn(conn)
+
+    if not task:
+        flash('Task not found or unauthorized.', 'danger')
+        return redirect(url_for('dashboard'))
+
     return render_template('edit_task.html', task=task, index=task_id)
 
 @app.route('/delete', methods=['POST'])
@@ -311,10 +522,11 @@ def delete_task():
 
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute('DELETE FROM tasks WHERE id = %s AND user_id = %s', (int(task_id), session['user_id']))
+    cur.execute(HOT_QUERIES['delete_task'], (int(task_id), session['user_id']), prepare=True)
     conn.commit()
     cur.close()
-    conn.close()
+    put_conn(conn)
+    bump_dashboard_version(session['user_id'])
     flash('Task deleted successfully!', 'success')
     return redirect(url_for('dashboard'))
 
@@ -323,15 +535,12 @@ def delete_task():
 def toggle_task(task_id):
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute('SELECT completed FROM tasks WHERE id = %s AND user_id = %s', (task_id, session['user_id']))
-    row = cur.fetchone()
-    if row:
-        new_status = not cast_bool(row['completed'])
-        cur.execute('UPDATE tasks SET completed = %s WHERE id = %s AND user_id = %s',
-                    (new_status, task_id, session['user_id']))
-        conn.commit()
+    # ek hi roundtrip; doosre user ka task ho to 0 rows update hote hain
+    cur.execute(HOT_QUERIES['toggle_task'], (task_id, session['user_id']), prepare=True)
+    conn.commit()
     cur.close()
-    conn.close()
+    put_conn(conn)
+    bump_dashboard_version(session['user_id'])
     return redirect(url_for('dashboard'))
 
 # ----------------- 📊 STATS DASHBOARD ------------------
@@ -342,17 +551,24 @@ def stats_dashboard():
     cur = conn.cursor()
     uid = session['user_id']
 
-    cur.execute("SELECT id, completed, due_date FROM tasks WHERE user_id = %s", (uid,))
-    rows = cur.fetchall()
+    cur.execute("""
+        SELECT
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE completed) AS completed,
+            COUNT(*) FILTER (WHERE NOT COALESCE(completed, FALSE) AND due_date < now()) AS overdue,
+            COUNT(*) FILTER (WHERE due_date::date = CURRENT_DATE) AS due_today
+        FROM tasks
+        WHERE user_id = %s
+    """, (uid,))
+    row = cur.fetchone()
     cur.close()
-    conn.close()
+    put_conn(conn)
 
-    total = len(rows)
-    completed = sum(1 for r in rows if cast_bool(r['completed']))
+    total     = row['total']
+    completed = row['completed']
     pending   = total - completed
-    now = datetime.now()
-    overdue   = sum(1 for r in rows if (r['due_date'] and r['due_date'] < now and not cast_bool(r['completed'])))
-    due_today = sum(1 for r in rows if (r['due_date'] and r['due_date'].date() == date.today()))
+    overdue   = row['overdue']
+    due_today = row['due_today']
 
     return render_template(
         "stats.html",
@@ -360,68 +576,89 @@ def stats_dashboard():
     )
 
 # ----------------- REMINDERS ------------------
-def send_reminder_email(to_email, subject, body_text):
-    if not app.config['MAIL_USERNAME'] or not app.config['MAIL_PASSWORD']:
-        print("Mail creds missing; skipping email send.")
-        return
-    msg = Message(subject=subject, sender=app.config['MAIL_USERNAME'], recipients=[to_email])
-    msg.body = body_text
-    print(f"📧 Sending '{subject}' to {to_email}")
-    mail.send(msg)
+def send_reminder_emails(messages):
+    print(f"📧 Queueing {len(messages)} reminder digest(s)")
+    send_email_batch_task.delay(messages)
 
 def send_reminders():
+    # hourly job scheduler.py chalata hai (ek hi process), web workers nahi
     with app.app_context():
         print("✅ Scheduler triggered send_reminders()")
         conn = get_conn()
-        cur = conn.cursor()
-        # pending tasks with a due_date
+        # server-side cursor: rows batches mein aate hain, fetchall() ki list nahi banti
+        cur = conn.cursor(name='rem_cur', binary=True)
+        # pending tasks due within a day (or overdue), not reminded in the last day;
+        # ek row per user -- email/username baar baar nahi aata
         cur.execute("""
-            SELECT t.id, t.description, t.due_date, t.completed, u.email, u.username
+            SELECT u.email, u.username,
+                   array_agg(t.id ORDER BY t.due_date) AS task_ids,
+                   array_agg(t.description ORDER BY t.due_date) AS descriptions,
+                   array_agg(t.due_date ORDER BY t.due_date) AS due_dates
             FROM tasks t
             JOIN users u ON t.user_id = u.id
-            WHERE t.due_date IS NOT NULL AND t.completed = FALSE
+            WHERE t.completed = FALSE
+              AND t.due_date IS NOT NULL
+              AND t.due_date <= now() + interval '1 day'
+              AND (t.reminder_sent IS NULL OR t.reminder_sent < now() - interval '1 day')
+            GROUP BY u.id, u.email, u.username
         """)
-        rows = cur.fetchall()
+
+        now = datetime.now(UTC)
+        messages = []
+        task_ids = []
+        for r in cur:
+            # har user ko ek digest mail, saare due soon + overdue tasks ke saath
+            due_soon, overdue = [], []
+            for desc, due in zip(r['descriptions'], r['due_dates']):
+                line = f"- '{desc}' (due {due.strftime('%b %d, %Y %I:%M %p')})"
+                (due_soon if due >= now else overdue).append(line)
+
+            subject_parts = []
+            body_parts = [f"Hi {r['username']},"]
+            if due_soon:
+                subject_parts.append(f"⏰ {len(due_soon)} due soon")
+                body_parts.append("These tasks are due soon:\n" + "\n".join(due_soon))
+            if overdue:
+                subject_parts.append(f"⚠️ {len(overdue)} overdue")
+                body_parts.append("These tasks are now overdue!\n" + "\n".join(overdue))
+
+            messages.append((
+                r['email'],
+                "Task reminder: " + ", ".join(subject_parts),
+                "\n\n".join(body_parts),
+                r['task_ids']
+            ))
+            task_ids.extend(r['task_ids'])
         cur.close()
-        conn.close()
-
-        now = datetime.utcnow()
-        for r in rows:
-            due = r['due_date']
-            # treat due as UTC-naive if tzinfo absent
-            due_utc = due if due.tzinfo else pytz.utc.localize(due)
-            delta = due_utc - pytz.utc.localize(now) if now.tzinfo is None else due_utc - now
-
-            if timedelta(0) <= delta <= timedelta(days=1):
-                send_reminder_email(
-                    r['email'],
-                    f"⏰ Reminder: '{r['description']}' is due soon!",
-                    f"Hi {r['username']},\n\nYour task '{r['description']}' is due on {due.strftime('%b %d, %Y %I:%M %p')}."
-                )
-            elif due_utc < (pytz.utc.localize(now) if now.tzinfo is None else now):
-                send_reminder_email(
-                    r['email'],
-                    f"⚠️ Overdue Task: '{r['description']}'",
-                    f"Hi {r['username']},\n\nYour task '{r['description']}' was due on {due.strftime('%b %d, %Y %I:%M %p')} and is now overdue!"
-                )
+
+        if not messages or not app.config['MAIL_USERNAME'] or not app.config['MAIL_PASSWORD']:
+            if messages:
+                print("Mail creds missing; skipping email send.")
+            conn.rollback()
+            put_conn(conn)
+            return
+
+        # stamp + commit enqueue se PEHLE: worker ka failed-ids reset (reminder_sent = NULL)
+        # baad mein hi commit hoga, isliye hamara stamp use overwrite nahi kar sakta
+        cur = conn.cursor()
+        cur.execute('UPDATE tasks SET reminder_sent = now() WHERE id = ANY(%s)', (task_ids,))
+        conn.commit()
+        try:
+            send_reminder_emails(messages)
+        except Exception:
+            # queue tak pahuncha hi nahi -> stamp hatao taaki agla run retry kare
+            cur.execute('UPDATE tasks SET reminder_sent = NULL WHERE id = ANY(%s)', (task_ids,))
+            conn.commit()
+            raise
+        finally:
+            cur.close()
+            put_conn(conn)
 
 @app.route('/test-reminder')
 def test_reminder():
     send_reminders()
     return 'Reminder emails attempted (check server logs / mailbox).'
 
-# ----------------- SCHEDULER ------------------
-scheduler = BackgroundScheduler()
-scheduler.start()
-scheduler.add_job(
-    func=send_reminders,
-    trigger=IntervalTrigger(hours=1),
-    id='reminder_job',
-    name='Send email reminders every hour',
-    replace_existing=True
-)
-atexit.register(lambda: scheduler.shutdown())
-
 # ----------------- MAIN ------------------
 if __name__ == "__main__":
     app.run(debug=True, use_reloader=False)
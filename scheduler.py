@@ -0,0 +1,22 @@
+# Reminder scheduler -- apna alag process, taaki har gunicorn worker job na chalaye:
+#   python scheduler.py
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+
+from app import send_reminders
+
+scheduler = BlockingScheduler(job_defaults={'coalesce': True, 'max_instances': 1})
+scheduler.add_job(
+    func=send_reminders,
+    trigger=IntervalTrigger(hours=1),
+    id='reminder_job',
+    name='Send email reminders every hour',
+    replace_existing=True
+)
+
+if __name__ == "__main__":
+    print("⏰ Reminder scheduler started")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
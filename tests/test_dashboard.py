@@ -0,0 +1,86 @@
+# Integration tests: real Postgres (DATABASE_URL) aur Redis (REDIS_URL) chahiye.
+# Har run apni throwaway database + Redis key prefix use karta hai aur end mein drop/clear.
+import importlib
+import os
+import sys
+import uuid
+
+import pytest
+
+BASE_DATABASE_URL = os.environ.get("DATABASE_URL")
+if not BASE_DATABASE_URL or not os.environ.get("REDIS_URL"):
+    pytest.skip("DATABASE_URL and REDIS_URL required", allow_module_level=True)
+
+psycopg = pytest.importorskip("psycopg")
+from psycopg.conninfo import make_conninfo  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def todo():
+    dbname = f"todo_test_{uuid.uuid4().hex[:8]}"
+    try:
+        with psycopg.connect(BASE_DATABASE_URL, autocommit=True) as admin:
+            admin.execute(f'CREATE DATABASE "{dbname}"')
+    except psycopg.Error as e:
+        pytest.skip(f"cannot create throwaway database: {e}")
+
+    mp = pytest.MonkeyPatch()
+    # app import pe hi pool + init_db() chalte hain, isliye env pehle set karo
+    mp.setenv("DATABASE_URL", make_conninfo(BASE_DATABASE_URL, dbname=dbname))
+    mp.setenv("CACHE_KEY_PREFIX", f"{dbname}:")
+    module = None
+    try:
+        module = importlib.import_module("app")
+        yield module
+    finally:
+        if module is not None:
+            module.cache.clear()
+            module.POOL.close()
+        sys.modules.pop("app", None)
+        mp.undo()
+        with psycopg.connect(BASE_DATABASE_URL, autocommit=True) as admin:
+            admin.execute(f'DROP DATABASE IF EXISTS "{dbname}"')
+
+
+@pytest.fixture
+def client(todo, monkeypatch):
+    todo.app.config['TESTING'] = True
+    # welcome mail queue pe na jaaye
+    monkeypatch.setitem(todo.app.config, 'MAIL_USERNAME', None)
+    # 5-min ETag bucket pin karo, warna boundary cross hone pe test flaky
+    monkeypatch.setattr(todo, 'dashboard_bucket', lambda: 0)
+    with todo.app.test_client() as c:
+        username = f"test_{uuid.uuid4().hex[:8]}"
+        c.post('/register', data={'username': username,
+                                  'email': f"{username}@example.com",
+                                  'password': 'secret'})
+        c.post('/login', data={'username': username, 'password': 'secret'})
+        c.get('/dashboard')  # login flash consume
+        yield c
+
+
+def test_added_task_shows_on_cached_dashboard(client):
+    first = client.get('/dashboard')
+    assert first.status_code == 200
+    assert first.headers.get('ETag')
+
+    desc = f"task {uuid.uuid4().hex[:8]}"
+    resp = client.post('/add', data={'task': desc, 'due_date': '2099-01-01T10:00'})
+    assert resp.status_code == 302
+
+    client.get('/dashboard')  # "Task added" flash consume (uncached render)
+    page = client.get('/dashboard')
+    assert page.status_code == 200
+    assert desc in page.get_data(as_text=True)
+    assert 'Jan 01, 2099 10:00 AM' in page.get_data(as_text=True)
+    assert page.headers['ETag'] != first.headers['ETag']
+
+
+def test_not_modified_carries_validators(client):
+    page = client.get('/dashboard')
+    etag = page.headers['ETag']
+
+    resp = client.get('/dashboard', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert resp.headers['ETag'] == etag
+    assert resp.headers['Cache-Control'] == 'private, no-cache'
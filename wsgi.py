@@ -0,0 +1,7 @@
+# gevent entrypoint -- SMTP/DB I/O pe worker block nahi hota:
+#   gunicorn -k gevent --worker-connections=100 wsgi:app
+# monkey.patch_all() app import se pehle hona chahiye
+from gevent import monkey
+monkey.patch_all()
+
+from app import app  # noqa: E402